@@ -3,33 +3,50 @@ Test Technique Pertimm - Niveau 1
 Automatisation des interactions avec l'API Concrete-datastore
 """
 
+import random
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 from typing import Dict, Optional
 import json
 
 
+# Réponses passagères : wait_for_completion continue d'interroger le statut
+_TRANSIENT_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
 class PertimmAPIClient:
     """Client pour interagir avec l'API Pertimm hire-game."""
 
     BASE_URL = "https://hire-game.pertimm.dev"
+    TIMEOUT = 5  # Secondes par tentative HTTP (hors rejeux urllib3) pour les appels de candidature
     
     def __init__(self):
         """Initialise le client API."""
         self.token: Optional[str] = None
         self.session = requests.Session()
-    
-    def _get_headers(self) -> Dict[str, str]:
-        """
-        Retourne les en-têtes HTTP avec le token d'authentification.
         
-        Returns:
-            Dictionnaire contenant les en-têtes HTTP
-        """
-        headers = {"Content-Type": "application/json"}
-        if self.token:
-            headers["Authorization"] = f"Token {self.token}"
-        return headers
+        # Un seul hôte : un pool dédié garde la connexion TCP/TLS ouverte
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=16,
+            # Seuls les échecs de connexion sont rejoués par urllib3 (la requête n'a
+            # pas atteint le serveur). Les POST/PATCH ne sont jamais rejoués après
+            # envoi, et wait_for_completion gère lui-même ses nouvelles tentatives
+            # jusqu'à son échéance.
+            max_retries=Retry(
+                total=3,
+                connect=3,
+                read=0,
+                status=0,
+                backoff_factor=0.3,
+                backoff_jitter=0.3,
+                respect_retry_after_header=False
+            )
+        )
+        self.session.mount("https://", adapter)
+        self.session.headers["Content-Type"] = "application/json"
     
     def register(
         self, 
@@ -63,7 +80,7 @@ class PertimmAPIClient:
         print(json.dumps(data, indent=4))
         
         try:
-            response = self.session.post(url, json=data, headers=self._get_headers())
+            response = self.session.post(url, json=data, timeout=self.TIMEOUT)
             response.raise_for_status()
 
             try:
@@ -107,11 +124,14 @@ class PertimmAPIClient:
         data = {"email": email, "password": password}
         
         try:
-            response = self.session.post(url, json=data, headers=self._get_headers())
+            response = self.session.post(url, json=data, timeout=self.TIMEOUT)
             response.raise_for_status()
             
             result = response.json()
             self.token = result.get("token")
+            if self.token:
+                # Envoyé automatiquement par la session sur toutes les requêtes suivantes
+                self.session.headers["Authorization"] = f"Token {self.token}"
             return self.token
         except requests.exceptions.RequestException as e:
             print(f"\n❌ ERREUR DE CONNEXION : {e}")
@@ -141,45 +161,91 @@ class PertimmAPIClient:
             "last_name": last_name
         }
         
-        response = self.session.post(url, json=data, headers=self._get_headers())
+        response = self.session.post(url, json=data, timeout=self.TIMEOUT)
         response.raise_for_status()
         return response.json()
     
-    def wait_for_completion(self, status_url: str, timeout: int = 30) -> Dict:
+    def wait_for_completion(
+        self,
+        status_url: str,
+        timeout: float = 30,
+        base: float = 1.3,
+        initial: float = 0.05,
+        cap: float = 2.0
+    ) -> Dict:
         """
         Attend que le statut de l'application soit COMPLETED.
         
+        Le statut est interrogé immédiatement, puis selon un backoff
+        exponentiel avec "full jitter" : l'attente avant le n-ième nouvel
+        essai est tirée dans [0, min(cap, initial * base**n)], sans jamais
+        dépasser l'échéance fixée par `timeout`. Chaque requête est bornée par
+        le temps restant, et les échecs passagers (délai dépassé, 429/5xx) sont
+        rejoués ici plutôt que par urllib3. Seul un échec de connexion peut
+        prolonger l'attente, du backoff de ses rejeux urllib3.
+        
         Args:
             status_url: URL pour vérifier le statut
             timeout: Temps maximum d'attente en secondes
+            base: Facteur de croissance du délai entre deux vérifications
+            initial: Délai maximal avant la deuxième vérification (secondes)
+            cap: Délai maximal entre deux vérifications (secondes)
             
         Returns:
             Réponse JSON finale avec confirmation_url
         """
-        start_time = time.time()
-        check_interval = 0.5  # Vérifie toutes les 0.5 secondes
+        deadline = time.monotonic() + timeout
+        delay = initial
         
-        while time.time() - start_time < timeout:
-            response = self.session.get(
-                status_url, 
-                headers=self._get_headers()
-            )
-            response.raise_for_status()
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             
-            result = response.json()
-            status = result.get("status")
-            
-            print(f"   Status actuel: {status}")
-            
-            if status == "COMPLETED":
-                return result
+            # Chaque tentative est bornée par le temps restant ; seul un échec de
+            # connexion peut être rejoué par urllib3 au-delà (avec son backoff)
+            result = self._fetch_status(status_url, min(self.TIMEOUT, remaining))
+            if result is not None:
+                status = result.get("status")
+                
+                print(f"   Status actuel: {status}")
+                
+                if status == "COMPLETED":
+                    return result
             
-            time.sleep(check_interval)
+            remaining = max(0.0, deadline - time.monotonic())
+            time.sleep(min(random.uniform(0, delay), remaining))
+            delay = min(cap, delay * base)
         
         raise TimeoutError(
             f"L'application n'a pas été complétée dans les {timeout} secondes"
         )
     
+    def _fetch_status(self, status_url: str, timeout: float) -> Optional[Dict]:
+        """
+        Interroge une fois le statut de l'application.
+        
+        Args:
+            status_url: URL pour vérifier le statut
+            timeout: Temps maximum accordé à cette requête en secondes
+            
+        Returns:
+            Réponse JSON, ou None si l'échec est passager (délai dépassé,
+            connexion perdue, 429/5xx) et qu'il faut réessayer plus tard
+        """
+        try:
+            response = self.session.get(status_url, timeout=timeout)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            print(f"   ⚠ Statut indisponible ({type(e).__name__}), nouvel essai")
+            return None
+        
+        if response.status_code in _TRANSIENT_STATUSES:
+            print(f"   ⚠ Statut indisponible (HTTP {response.status_code}), nouvel essai")
+            return None
+        
+        response.raise_for_status()
+        return response.json()
+    
     def confirm_application(self, confirmation_url: str) -> Dict:
         """
         Confirme l'application en envoyant une requête PATCH.
@@ -192,11 +258,7 @@ class PertimmAPIClient:
         """
         data = {"confirmed": True}
         
-        response = self.session.patch(
-            confirmation_url, 
-            json=data, 
-            headers=self._get_headers()
-        )
+        response = self.session.patch(confirmation_url, json=data, timeout=self.TIMEOUT)
         response.raise_for_status()
         return response.json()
 
@@ -4,13 +4,25 @@ Résolution automatique du labyrinthe avec algorithme de pathfinding optimisé (
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, List, Tuple, Optional, Set
 from collections import deque
+import heapq
+
+
+# Déplacements vers les 4 voisins (ordre d'exploration du BFS)
+_DIRS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+# En-tête du corps de formulaire pré-encodé envoyé par move_to
+_FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
 
 
 class MazeCell:
     """Représente une cellule du labyrinthe."""
     
+    __slots__ = ("x", "y", "value", "movable", "passable")
+    
     def __init__(self, x: int, y: int, value: str, movable: bool):
         """
         Initialise une cellule du labyrinthe.
@@ -25,6 +37,8 @@ class MazeCell:
         self.y = y
         self.value = value
         self.movable = movable
+        # Traversable par le pathfinding : déplaçable et sans piège
+        self.passable = movable and value != "trap"
     
     def __repr__(self) -> str:
         """Représentation textuelle de la cellule."""
@@ -35,17 +49,47 @@ class MazeSolver:
     """Résolveur de labyrinthe optimisé utilisant l'exploration par frontière."""
     
     BASE_URL = "https://hire-game-maze.pertimm.dev"
+    TIMEOUT = 5  # Secondes par tentative HTTP (hors rejeux urllib3) : un coup bloqué ne fige pas la partie
     
-    def __init__(self, player_name: str):
+    def __init__(self, player_name: str, verbose: bool = False, static_map: bool = True):
         """
         Initialise le résolveur de labyrinthe.
         
         Args:
             player_name: Nom du joueur
+            verbose: Affiche la trace de chaque itération (désactivé par défaut
+                pour ne pas payer d'I/O console dans la boucle de résolution)
+            static_map: Le labyrinthe ne change pas en cours de partie : une position
+                déjà scannée n'est pas redécouverte (un aller-retour HTTP de moins)
         """
         self.player_name = player_name
+        self.verbose = verbose
+        self.static_map = static_map
         self.session = requests.Session()
         
+        # Des centaines de requêtes vers le même hôte : un pool dédié
+        # garde la connexion TCP/TLS ouverte pendant toute la partie
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=16,
+            # discover_surroundings (GET) est rejoué sur délai de lecture ou 429/5xx.
+            # start_game et move_to (POST) ne le sont que sur échec de connexion :
+            # un coup reçu a pu être joué et url_move a alors déjà changé.
+            max_retries=Retry(
+                total=5,
+                connect=3,
+                read=3,
+                status=3,
+                backoff_factor=0.3,
+                backoff_jitter=0.3,
+                status_forcelist=(429, 500, 502, 503, 504),
+                respect_retry_after_header=True,
+                raise_on_status=False,  # Dernière réponse rendue : raise_for_status() lève HTTPError
+                allowed_methods=frozenset(["GET"])
+            )
+        )
+        self.session.mount("https://", adapter)
+        
         # État du jeu
         self.position_x: Optional[int] = None
         self.position_y: Optional[int] = None
@@ -55,6 +99,15 @@ class MazeSolver:
         # Connaissance du monde
         self.discovered_map: Dict[Tuple[int, int], MazeCell] = {}
         self.scanned_positions: Set[Tuple[int, int]] = set() # Lieux où on a fait discover()
+        self.passable_positions: Set[Tuple[int, int]] = set() # Cases traversables par le BFS
+        self.frontier: Set[Tuple[int, int]] = set() # Cases traversables pas encore scannées
+        self.stop_pos: Optional[Tuple[int, int]] = None # Sortie, dès qu'elle est découverte
+        
+        # Boîte englobante de la carte découverte (pour visualize_map)
+        self.min_x: Optional[int] = None
+        self.max_x: Optional[int] = None
+        self.min_y: Optional[int] = None
+        self.max_y: Optional[int] = None
         
         self.move_count = 0
         self.move_history: List[Tuple[int, int]] = []
@@ -68,24 +121,38 @@ class MazeSolver:
         url = f"{self.BASE_URL}/start-game/"
         data = {"player": self.player_name}
         
-        response = self.session.post(url, data=data)
+        response = self.session.post(url, data=data, timeout=self.TIMEOUT)
         response.raise_for_status()
         
         result = response.json()
-        print ("************Result : ", result)
+        if self.verbose:
+            print("************Result : ", result)
         self._update_state(result)
         
         # Reset knowledge
         self.discovered_map = {}
         self.scanned_positions = set()
+        self.passable_positions = set()
+        self.frontier = set()
+        self.stop_pos = None
+        self.min_x = self.max_x = self.min_y = self.max_y = None
         self.move_count = 0
         self.move_history = []
         
         return result
     
     def discover_surroundings(self) -> List[MazeCell]:
-        """Découvre les cases environnantes."""
-        response = self.session.get(self.url_discover)
+        """
+        Découvre les cases environnantes.
+        
+        Returns:
+            Cellules reçues, ou liste vide si la position était déjà scannée
+            (carte statique : le voisinage est déjà connu).
+        """
+        if self.static_map and self.current_pos in self.scanned_positions:
+            return []
+        
+        response = self.session.get(self.url_discover, timeout=self.TIMEOUT)
         response.raise_for_status()
         
         cells_data = response.json()
@@ -98,20 +165,49 @@ class MazeSolver:
                 value=cell_data["value"],
                 movable=cell_data["move"]
             )
-            self.discovered_map[(cell.x, cell.y)] = cell
+            pos = (cell.x, cell.y)
+            self.discovered_map[pos] = cell
             new_cells.append(cell)
             
+            # Index maintenus au fil des découvertes (évite de re-parcourir la carte)
+            if cell.passable:
+                self.passable_positions.add(pos)
+                if pos not in self.scanned_positions:
+                    self.frontier.add(pos)
+            else:
+                self.passable_positions.discard(pos)
+                self.frontier.discard(pos)
+            if cell.value == "stop":
+                self.stop_pos = pos
+            
+            if self.min_x is None:
+                self.min_x = self.max_x = cell.x
+                self.min_y = self.max_y = cell.y
+            else:
+                if cell.x < self.min_x:
+                    self.min_x = cell.x
+                elif cell.x > self.max_x:
+                    self.max_x = cell.x
+                if cell.y < self.min_y:
+                    self.min_y = cell.y
+                elif cell.y > self.max_y:
+                    self.max_y = cell.y
+            
         # Marquer la position actuelle comme scannée
         if self.current_pos not in self.scanned_positions:
             self.scanned_positions.add(self.current_pos)
+        self.frontier.discard(self.current_pos)
             
         return new_cells
     
     def move_to(self, x: int, y: int) -> Dict:
         """Se déplace vers une nouvelle position."""
-        data = {"position_x": x, "position_y": y}
+        # Corps de formulaire pré-encodé : évite l'urlencode de requests à chaque coup
+        data = f"position_x={x:d}&position_y={y:d}"
         
-        response = self.session.post(self.url_move, data=data)
+        response = self.session.post(
+            self.url_move, data=data, headers=_FORM_HEADERS, timeout=self.TIMEOUT
+        )
         response.raise_for_status()
         
         result = response.json()
@@ -128,45 +224,115 @@ class MazeSolver:
         self.url_move = response["url_move"]
         self.url_discover = response["url_discover"]
     
-    def find_path_bfs(self, start: Tuple[int, int], target_condition_func) -> Optional[List[Tuple[int, int]]]:
+    def find_path_to_any(
+        self, start: Tuple[int, int], targets: Set[Tuple[int, int]]
+    ) -> Optional[List[Tuple[int, int]]]:
         """
-        Trouve le chemin le plus court vers la première case qui satisfait `target_condition_func`.
+        Trouve le chemin le plus court (BFS) vers la plus proche des positions de `targets`.
+        
+        Pour une cible unique, utiliser `find_path_astar`.
         
         Args:
             start: Position de départ (x, y)
-            target_condition_func: Fonction qui prend une pos (x,y) et retourne True si c'est une cible valide.
+            targets: Ensemble des positions (x, y) considérées comme cibles valides.
             
         Returns:
             Liste de coordonnées [start, ..., target] ou None.
         """
-        queue = deque([(start, [start])])
-        visited = {start}
+        # Pointeurs parents : le chemin n'est reconstruit qu'une fois la cible atteinte
+        queue = deque([start])
+        parent: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
         
         while queue:
-            current, path = queue.popleft()
+            current = queue.popleft()
             
             # Si on atteint une cible
-            if target_condition_func(current):
-                return path
+            if current in targets:
+                return self._reconstruct_path(parent, current)
             
-            # Explorer voisins
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = current[0] + dx, current[1] + dy
-                neighbor_pos = (nx, ny)
-                
-                if neighbor_pos in visited:
+            # Explorer voisins (même ordre que _DIRS, déroulé : c'est la boucle la plus chaude)
+            cx, cy = current
+            for neighbor_pos in ((cx, cy + 1), (cx, cy - 1), (cx + 1, cy), (cx - 1, cy)):
+                if neighbor_pos in parent:
                     continue
                 
                 # On ne peut traverser que des cases connues et ""movable"" (et pas de pièges)
                 # Exception: la cible peut être hors map si c'est ce qu'on cherche, 
                 # mais ici on navigue DANS discovered_map pour atteindre la frontière.
-                cell = self.discovered_map.get(neighbor_pos)
-                
-                if cell and cell.movable and cell.value != "trap":
-                    visited.add(neighbor_pos)
-                    queue.append((neighbor_pos, path + [neighbor_pos]))
+                if neighbor_pos in self.passable_positions:
+                    parent[neighbor_pos] = current
+                    queue.append(neighbor_pos)
                     
         return None
+    
+    def find_path_astar(
+        self, start: Tuple[int, int], goal: Tuple[int, int]
+    ) -> Optional[List[Tuple[int, int]]]:
+        """
+        Trouve le plus court chemin vers une position connue avec A*.
+        
+        L'heuristique de Manhattan est admissible et cohérente sur une grille
+        4-connexe à coût unitaire : le chemin est optimal et l'exploration est
+        orientée vers la cible au lieu de s'étendre dans toutes les directions.
+        
+        Args:
+            start: Position de départ (x, y)
+            goal: Position d'arrivée (x, y)
+            
+        Returns:
+            Liste de coordonnées [start, ..., goal] ou None.
+        """
+        gx, gy = goal
+        g_score: Dict[Tuple[int, int], int] = {start: 0}
+        came_from: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+        counter = 0  # Départage les égalités de f sans comparer les positions
+        heap = [(abs(start[0] - gx) + abs(start[1] - gy), counter, start)]
+        
+        while heap:
+            _, _, current = heapq.heappop(heap)
+            
+            if current == goal:
+                return self._reconstruct_path(came_from, current)
+            
+            g = g_score[current] + 1
+            for dx, dy in _DIRS:
+                nx, ny = current[0] + dx, current[1] + dy
+                neighbor_pos = (nx, ny)
+                
+                if neighbor_pos not in self.passable_positions:
+                    continue
+                if g >= g_score.get(neighbor_pos, g + 1):
+                    continue
+                
+                g_score[neighbor_pos] = g
+                came_from[neighbor_pos] = current
+                counter += 1
+                heapq.heappush(heap, (g + abs(nx - gx) + abs(ny - gy), counter, neighbor_pos))
+        
+        return None
+    
+    @staticmethod
+    def _reconstruct_path(
+        parent: Dict[Tuple[int, int], Optional[Tuple[int, int]]],
+        target: Tuple[int, int]
+    ) -> List[Tuple[int, int]]:
+        """
+        Reconstruit le chemin [start, ..., target] en remontant les pointeurs parents.
+        
+        Args:
+            parent: Dictionnaire position -> position précédente (None pour le départ)
+            target: Position d'arrivée
+            
+        Returns:
+            Liste de coordonnées du départ jusqu'à la cible.
+        """
+        path = []
+        node: Optional[Tuple[int, int]] = target
+        while node is not None:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return path
 
     def solve_optimized(self) -> bool:
         """
@@ -178,37 +344,39 @@ class MazeSolver:
             # 1. Observer
             self.discover_surroundings()
             
-            # 2. Vérifier si on voit la SORTIE (stop)
-            stop_pos = None
-            for pos, cell in self.discovered_map.items():
-                if cell.value == "stop":
-                    stop_pos = pos
-                    break
+            # 2. Vérifier si on voit la SORTIE (stop), repérée lors des découvertes
+            stop_pos = self.stop_pos
             
             target_path = None
             
-            if stop_pos:
+            # Cible adjacente (la sortie, ou une frontière tant que la sortie est
+            # inconnue) : le premier voisin qui convient est celui qu'aurait choisi
+            # le pathfinder, inutile de le lancer
+            adjacent_targets = (stop_pos,) if stop_pos else self.frontier
+            for dx, dy in _DIRS:
+                neighbor_pos = (self.position_x + dx, self.position_y + dy)
+                if neighbor_pos in adjacent_targets and neighbor_pos in self.passable_positions:
+                    target_path = [self.current_pos, neighbor_pos]
+                    break
+            
+            if target_path is None and stop_pos:
                 # Si on voit la sortie, on y va directement
-                print(f"   ! Sortie détectée en {stop_pos}. Calcul du chemin...")
-                target_path = self.find_path_bfs(
-                    self.current_pos, 
-                    lambda p: p == stop_pos
-                )
-            else:
+                if self.verbose:
+                    print(f"   ! Sortie détectée en {stop_pos}. Calcul du chemin...")
+                target_path = self.find_path_astar(self.current_pos, stop_pos)
+            elif target_path is None:
                 # Sinon, on cherche la case "Frontière" la plus proche.
                 # Une frontière est une case connue (reachable) mais non scannée.
-                target_path = self.find_path_bfs(
-                    self.current_pos,
-                    lambda p: p in self.discovered_map and p not in self.scanned_positions
-                )
+                target_path = self.find_path_to_any(self.current_pos, self.frontier)
             
             if not target_path:
                 print("   ✗ Aucun chemin trouvé vers un objectif. Labyrinthe impossible ?")
                 return False
                 
             # target_path contient [current_pos, next_step, ... target]
-            # On avance d'UN PAS seulement, puis on re-discover (pour mettre à jour la map).
-            # Sauf si on fonce vers le 'stop', on pourrait optimiser, mais la prudence est de re-scanner.
+            # En exploration, on avance d'UN PAS seulement, puis on re-discover (pour mettre à jour la map).
+            # Vers le 'stop', le chemin ne traverse que des cases connues et sûres :
+            # on le parcourt en entier sans re-scanner (un aller-retour HTTP économisé par pas).
             
             if len(target_path) < 2:
                 # On est déjà sur la cible ? (ex: sortie atteinte au tour précédent mais pas détectée?)
@@ -219,18 +387,23 @@ class MazeSolver:
                 print("   ? Chemin vide ou longueur 1 alors qu'on cherche à bouger.")
                 return False
 
-            next_step = target_path[1] # Le prochain pas immédiat
+            steps = target_path[1:] if stop_pos else target_path[1:2]
             
-            # Exécuter le mouvement
-            # print(f"   Mouvement: {self.current_pos} -> {next_step}")
-            result = self.move_to(next_step[0], next_step[1])
-            
-            if result.get("win"):
-                print("   ✓ VICTOIRE !")
-                return True
-            if result.get("dead"):
-                print("   ✗ MORT (Piège).")
-                return False
+            for next_step in steps:
+                # Exécuter le mouvement
+                if self.verbose:
+                    print(f"   Mouvement: {self.current_pos} -> {next_step}")
+                result = self.move_to(next_step[0], next_step[1])
+                
+                if result.get("win"):
+                    print("   ✓ VICTOIRE !")
+                    return True
+                if result.get("dead"):
+                    print("   ✗ MORT (Piège).")
+                    return False
+                if self.current_pos != next_step:
+                    # Coup refusé : on re-planifie depuis la position réelle
+                    break
                 
         print("   ✗ Trop d'itérations.")
         return False
@@ -240,24 +413,24 @@ class MazeSolver:
         if not self.discovered_map:
             return
         
-        xs = [c.x for c in self.discovered_map.values()]
-        ys = [c.y for c in self.discovered_map.values()]
-        min_x, max_x = min(xs), max(xs)
-        min_y, max_y = min(ys), max(ys)
+        # Boîte englobante maintenue par discover_surroundings
+        min_x, max_x = self.min_x, self.max_x
+        min_y, max_y = self.min_y, self.max_y
         
         symbols = {"wall": "█", "path": " ", "trap": "X", "home": "H", "stop": "E"}
         
-        print(f"\n   === Carte ({len(self.discovered_map)} cases) ===")
+        lines = [f"\n   === Carte ({len(self.discovered_map)} cases) ==="]
         for y in range(min_y, max_y + 1):
-            line = ""
+            row = []
             for x in range(min_x, max_x + 1):
                 if (x, y) == self.current_pos:
-                    line += "●"
+                    row.append("●")
                 elif (x, y) in self.discovered_map:
-                    line += symbols.get(self.discovered_map[(x, y)].value, "?")
+                    row.append(symbols.get(self.discovered_map[(x, y)].value, "?"))
                 else:
-                    line += "░" # Inconnu
-            print("   " + line)
+                    row.append("░") # Inconnu
+            lines.append("   " + "".join(row))
+        print("\n".join(lines))
         print()
 
 